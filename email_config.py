@@ -3,11 +3,29 @@ Email Configuration Manager
 Stores and retrieves SMTP credentials securely
 """
 
+import functools
 import json
 import base64
 import os
 from pathlib import Path
 
+# orjson parses/serializes straight from bytes and is a few times faster
+# than the stdlib json; fall back to json when it isn't installed
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+# Store passwords in the OS keyring (libsecret/Keychain/Credential Manager)
+# when available; the JSON file then only holds server/port/email. Without
+# keyring we fall back to the old base64-obfuscated field in the file.
+try:
+    import keyring
+except ImportError:
+    keyring = None
+
+KEYRING_SERVICE = 'nsp_sender'
+
 
 class EmailConfig:
     def __init__(self, config_file=".email_config.json"):
@@ -18,12 +36,16 @@ class EmailConfig:
         """Load existing configuration"""
         if self.config_file.exists():
             try:
-                with open(self.config_file, 'r') as f:
-                    config = json.load(f)
-                    # Decode password
-                    if 'password' in config:
-                        config['password'] = base64.b64decode(config['password'].encode()).decode()
-                    return config
+                if orjson is not None:
+                    config = orjson.loads(self.config_file.read_bytes())
+                else:
+                    with open(self.config_file, 'r') as f:
+                        config = json.load(f)
+                # Decode password (legacy format only; with keyring the
+                # password never touches the file)
+                if 'password' in config:
+                    config['password'] = base64.b64decode(config['password'].encode()).decode()
+                return config
             except:
                 return {}
         return {}
@@ -34,11 +56,25 @@ class EmailConfig:
             'smtp_server': smtp_server,
             'smtp_port': smtp_port,
             'email': email,
-            'password': base64.b64encode(password.encode()).decode()  # Basic encoding
         }
 
-        with open(self.config_file, 'w') as f:
-            json.dump(config, f)
+        stored_in_keyring = False
+        if keyring is not None:
+            try:
+                keyring.set_password(KEYRING_SERVICE, email, password)
+                stored_in_keyring = True
+            except Exception:
+                # keyring imports fine on headless boxes but raises when no
+                # backend is available; fall back to the file field
+                pass
+        if not stored_in_keyring:
+            config['password'] = base64.b64encode(password.encode()).decode()  # Basic encoding
+
+        if orjson is not None:
+            self.config_file.write_bytes(orjson.dumps(config))
+        else:
+            with open(self.config_file, 'w') as f:
+                json.dump(config, f)
 
         # Make file read-only for current user
         try:
@@ -46,27 +82,59 @@ class EmailConfig:
         except:
             pass  # Windows might not support this
 
+        # Drop the cached credential dict so later reads see the new values
+        self.__dict__.pop('credentials', None)
+
         print(f"✓ Configuration saved to {self.config_file}")
 
     def has_config(self):
         """Check if configuration exists"""
         return bool(self.config)
 
+    @functools.cached_property
+    def credentials(self):
+        """All credentials as one dict, resolved once per instance
+
+        Call sites read the four values back-to-back; caching the dict
+        means the keyring is hit at most once instead of per accessor.
+        """
+        # Legacy configs carry the password in the file; otherwise it is
+        # fetched from the keyring on demand
+        password = self.config.get('password')
+        if password is None and keyring is not None:
+            try:
+                password = keyring.get_password(KEYRING_SERVICE, self.config.get('email'))
+            except Exception:
+                # No usable keyring backend (headless box); nothing to read
+                pass
+        return {
+            'smtp_server': self.config.get('smtp_server'),
+            'smtp_port': self.config.get('smtp_port'),
+            'email': self.config.get('email'),
+            'password': password,
+        }
+
     def get_smtp_server(self):
-        return self.config.get('smtp_server')
+        return self.credentials['smtp_server']
 
     def get_smtp_port(self):
-        return self.config.get('smtp_port')
+        return self.credentials['smtp_port']
 
     def get_email(self):
-        return self.config.get('email')
+        return self.credentials['email']
 
     def get_password(self):
-        return self.config.get('password')
+        return self.credentials['password']
 
     def clear_config(self):
         """Delete saved configuration"""
+        if keyring is not None and self.config.get('email'):
+            try:
+                keyring.delete_password(KEYRING_SERVICE, self.config['email'])
+            except Exception:
+                pass
         if self.config_file.exists():
             self.config_file.unlink()
             print("✓ Configuration cleared")
         self.config = {}
+        self.__dict__.pop('credentials', None)
@@ -3,220 +3,136 @@ Lab Report Sender - Main Script
 Sends graded lab reports to NSPs via email
 """
 
-import pandas as pd
-import smtplib
-from email.mime.text import MIMEText
-from email.mime.multipart import MIMEMultipart
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from pathlib import Path
+from string import Template
 from typing import Dict, List, Tuple
 import getpass
+import hashlib
+import os
+import queue
 from datetime import datetime
 from email_config import EmailConfig
 
 
-class LabReportSender:
-    def __init__(self, grading_file: str, email_list_file: str):
-        self.grading_file = grading_file
-        self.email_list_file = email_list_file
-        self.email_list = None
-        self.grading_data = None
+# pandas takes ~0.5s to import cold; defer it so config-only CLI flows
+# (configure/clear credentials) start instantly
+_pd = None
 
-    def load_email_list(self):
-        """Load NSP email list from Excel file"""
-        print("Loading NSP email list...")
-        df = pd.read_excel(self.email_list_file, sheet_name='QA Class List')
-        self.email_list = df[['Full Name', 'AmaliTech Email']].copy()
-        print(f"Loaded {len(self.email_list)} NSPs")
-        return self.email_list
 
-    def load_grading_data(self, module_name: str):
-        """Load grading data from specific module sheet"""
-        print(f"Loading grading data from {module_name}...")
+def _pandas():
+    """Import pandas on first use"""
+    global _pd
+    if _pd is None:
+        import pandas
+        _pd = pandas
+    return _pd
 
-        # Read Excel with proper structure:
-        # Row 1 (index 0): Allocated Points
-        # Row 2 (index 1): Passing Score, weights for 1st attempt
-        # Row 3 (index 2): weights for 2nd attempt
-        # Row 4 (index 3): Column headers (Review Date, Name of NSP, Reviewer, Lab Title, Attempt, rubrics, Total Score, etc.)
-        # Row 5+ (index 4+): Actual data
 
-        # Use row 3 (0-indexed) as header, which is Excel row 4
-        df_data = pd.read_excel(self.grading_file, sheet_name=module_name, header=3)
+# Prefer the Rust-backed calamine engine for XLSX parsing; it is typically
+# several times faster than openpyxl. Fall back to openpyxl when the
+# python-calamine package isn't installed.
+try:
+    import python_calamine  # noqa: F401
+    EXCEL_ENGINE = 'calamine'
+except ImportError:
+    EXCEL_ENGINE = 'openpyxl'
 
-        self.grading_data = df_data
-        print(f"Loaded {len(df_data)} grading records")
-        return df_data
 
-    def match_nsp_email(self, nsp_name: str) -> str:
-        """Match NSP name to email address"""
-        if self.email_list is None:
-            self.load_email_list()
+# rapidfuzz scores name similarity in C; without it we fall back to the
+# pure-Python token-overlap scan
+try:
+    from rapidfuzz import fuzz, process
+except ImportError:
+    fuzz = process = None
 
-        # Clean up name for matching
-        nsp_name_clean = str(nsp_name).strip().lower()
 
-        # Try exact match first
-        match = self.email_list[self.email_list['Full Name'].str.strip().str.lower() == nsp_name_clean]
+def open_workbook(path):
+    """Open an Excel workbook with the fastest available engine"""
+    pd = _pandas()
+    if EXCEL_ENGINE == 'calamine':
+        return pd.ExcelFile(path, engine='calamine')
+    # openpyxl's default mode builds the full cell graph in memory;
+    # read_only streams the sheet XML and data_only skips formula objects
+    return pd.ExcelFile(path, engine='openpyxl',
+                        engine_kwargs={'read_only': True, 'data_only': True})
 
-        if not match.empty:
-            return match.iloc[0]['AmaliTech Email']
 
-        # Try partial match - check if grading name is IN email list name
-        match = self.email_list[self.email_list['Full Name'].str.lower().str.contains(nsp_name_clean, na=False)]
-
-        if not match.empty:
-            return match.iloc[0]['AmaliTech Email']
-
-        # Try reverse partial match - check if any part of email list name is IN grading name
-        # This catches cases like "Bernice Mawuena" in grading matching "Bernice Adime Mawuena" in email list
-        for idx, row in self.email_list.iterrows():
-            email_name = str(row['Full Name']).lower().strip()
-            # Split both names into parts and check for significant overlap
-            email_parts = set(email_name.split())
-            grading_parts = set(nsp_name_clean.split())
-
-            # If at least 2 name parts match (e.g., "bernice" and "mawuena"), consider it a match
-            if len(email_parts.intersection(grading_parts)) >= 2:
-                return row['AmaliTech Email']
-
-        return None
-
-    def is_grade_complete(self, row) -> Tuple[bool, str]:
-        """
-        Check if a student's grade is complete (has scores AND remarks)
-        Returns: (is_complete, reason_if_incomplete)
-        """
-        # Check if total score exists and is > 0
-        total_score = row.get('Total Score', 0)
-        try:
-            total_score_float = float(total_score) if pd.notna(total_score) else 0.0
-        except:
-            total_score_float = 0.0
-
-        if total_score_float == 0:
-            return False, "No total score"
+# Parsed sheets are cached on disk keyed by (path, mtime, sheet, header),
+# so re-runs against an unchanged workbook skip Excel parsing entirely
+CACHE_DIR = Path.home() / '.cache' / 'nsp_sender'
 
-        # Check if at least one rubric score exists
-        excluded_cols = ['Review Date', 'Name of NSP', 'Reviewer', 'Lab Title', 'Attempt',
-                        'Total Score', 'Re-do Lab', 'Plagiarism Check', 'Remarks: Strengths',
-                        'Remarks: Gaps', 'Other Remarks']
 
-        has_rubric_score = False
-        for col in row.index:
-            if col not in excluded_cols:
-                score = row.get(col)
-                try:
-                    if pd.notna(score):
-                        float(score)  # Try to convert to float
-                        has_rubric_score = True
-                        break
-                except (ValueError, TypeError):
-                    pass
-
-        if not has_rubric_score:
-            return False, "No rubric scores"
+def _sheet_cache_path(path, sheet_name, header):
+    mtime = os.path.getmtime(path)
+    key = hashlib.sha1(f"{path}|{mtime}|{sheet_name}|{header}".encode()).hexdigest()
+    return CACHE_DIR / f"{key}.feather"
 
-        # Check if remarks exist (at least Strengths or Gaps)
-        strengths = row.get('Remarks: Strengths', '')
-        gaps = row.get('Remarks: Gaps', '')
 
-        has_remarks = pd.notna(strengths) or pd.notna(gaps)
+def parse_sheet_cached(source_file, sheet_name, header, parse):
+    """Load a sheet from the on-disk cache, or parse and cache it
 
-        if not has_remarks:
-            return False, "No remarks/feedback"
+    The cache key includes the workbook's mtime, so editing the file
+    invalidates stale entries automatically. Caching is best-effort:
+    if feather support is unavailable we just parse every time.
+    """
+    pd = _pandas()
+    try:
+        cache_path = _sheet_cache_path(source_file, sheet_name, header)
+    except OSError:
+        cache_path = None
 
-        return True, ""
-
-    def generate_email_content(self, row) -> Tuple[str, str]:
-        """Generate email subject and body from grading row"""
-
-        # Extract basic data using column names
-        nsp_name = row.get('Name of NSP', 'NSP')
-        reviewer = row.get('Reviewer', 'N/A')
-        lab_title = row.get('Lab Title', 'Lab')
-        attempt = row.get('Attempt', 'N/A')
-        total_score = row.get('Total Score', 0)
-        redo_lab = row.get('Re-do Lab', 'No')
-        plagiarism = row.get('Plagiarism Check', 'N/A')
-        strengths = row.get('Remarks: Strengths', '')
-        gaps = row.get('Remarks: Gaps', '')
-        other_remarks = row.get('Other Remarks', '')
-
-        # Determine pass/fail status
-        passing_score = 0.8
+    if cache_path is not None and cache_path.exists():
         try:
-            total_score_float = float(total_score) if pd.notna(total_score) else 0.0
-        except:
-            total_score_float = 0.0
+            # Memory-map the Feather file: Arrow exposes the columns as
+            # zero-copy views over the OS page cache, so scans (e.g. name
+            # searches) run straight over the mapped bytes
+            import pyarrow.feather as feather
+            return feather.read_table(cache_path, memory_map=True).to_pandas()
+        except Exception:
+            pass
 
-        status = "PASSED" if total_score_float >= passing_score else "NEEDS RE-DO"
+    df = parse()
 
-        # Get rubric scores
-        rubric_data = []
-        for col in row.index:
-            if col not in ['Review Date', 'Name of NSP', 'Reviewer', 'Lab Title', 'Attempt',
-                          'Total Score', 'Re-do Lab', 'Plagiarism Check', 'Remarks: Strengths',
-                          'Remarks: Gaps', 'Other Remarks']:
-                score = row.get(col)
-                try:
-                    if pd.notna(score):
-                        score_val = float(score)
-                        rubric_data.append((col, int(score_val) if score_val == int(score_val) else score_val))
-                except (ValueError, TypeError):
-                    pass
-
-        # Create subject
-        subject = f"Lab Grade: {lab_title} - {status}"
+    if cache_path is not None:
+        try:
+            cache_path.parent.mkdir(parents=True, exist_ok=True)
+            df.to_feather(cache_path)
+        except Exception:
+            pass
 
-        # Generate HTML email body
-        body = self._generate_html_email(
-            nsp_name, lab_title, status, total_score_float, passing_score,
-            attempt, redo_lab, plagiarism, rubric_data, strengths, gaps, other_remarks
-        )
+    return df
 
-        return subject, body
 
-    def _generate_html_email(self, nsp_name, lab_title, status, total_score, passing_score,
-                            attempt, redo_lab, plagiarism, rubric_data, strengths, gaps, other_remarks):
-        """Generate beautifully formatted HTML email"""
+# Minimum fraction of points needed to pass a lab
+PASSING_SCORE = 0.8
 
-        # Status colors
-        status_color = "#28a745" if status == "PASSED" else "#dc3545"
-        status_bg = "#d4edda" if status == "PASSED" else "#f8d7da"
-        status_icon = "✓" if status == "PASSED" else "✗"
 
-        # Score percentage
-        score_percent = int(total_score * 100)
-        passing_percent = int(passing_score * 100)
+# Fixed (non-rubric) columns of the grading sheet; everything else is a rubric
+NON_RUBRIC_COLUMNS = ['Review Date', 'Name of NSP', 'Reviewer', 'Lab Title', 'Attempt',
+                      'Total Score', 'Re-do Lab', 'Plagiarism Check', 'Remarks: Strengths',
+                      'Remarks: Gaps', 'Other Remarks']
 
-        # Build rubric rows
-        rubric_rows = ""
-        if rubric_data:
-            for rubric_name, score in rubric_data:
-                # Calculate score bar width (assume max score is 5)
-                bar_width = int((score / 5) * 100)
-                bar_color = "#28a745" if score >= 4 else "#ffc107" if score >= 3 else "#dc3545"
 
-                rubric_rows += f"""
+# Email templates are compiled once at import time; per-email rendering is a
+# single substitute() call instead of re-building multi-KB f-strings per row
+_RUBRIC_ROW_TEMPLATE = Template("""
                 <tr>
-                    <td style="padding: 12px; border-bottom: 1px solid #e9ecef; font-weight: 500;">{rubric_name}</td>
-                    <td style="padding: 12px; border-bottom: 1px solid #e9ecef; text-align: center; font-weight: bold; font-size: 18px;">{score}</td>
+                    <td style="padding: 12px; border-bottom: 1px solid #e9ecef; font-weight: 500;">$rubric_name</td>
+                    <td style="padding: 12px; border-bottom: 1px solid #e9ecef; text-align: center; font-weight: bold; font-size: 18px;">$score</td>
                     <td style="padding: 12px; border-bottom: 1px solid #e9ecef;">
                         <div style="background-color: #e9ecef; border-radius: 10px; height: 10px; overflow: hidden;">
-                            <div style="background-color: {bar_color}; width: {bar_width}%; height: 100%;"></div>
+                            <div style="background-color: $bar_color; width: $bar_width%; height: 100%;"></div>
                         </div>
                     </td>
                 </tr>
-                """
-        else:
-            rubric_rows = '<tr><td colspan="3" style="padding: 12px; text-align: center; color: #6c757d;">No rubric scores available</td></tr>'
+                """)
 
-        # Format remarks
-        strengths_text = strengths if pd.notna(strengths) else 'No feedback provided'
-        gaps_text = gaps if pd.notna(gaps) else 'No feedback provided'
-        other_text = other_remarks if pd.notna(other_remarks) else 'No additional remarks'
+_NO_RUBRIC_ROW = '<tr><td colspan="3" style="padding: 12px; text-align: center; color: #6c757d;">No rubric scores available</td></tr>'
 
-        html = f"""
+# The head and footer never change between emails; only the middle is
+# substituted per row
+_HTML_HEAD = """
 <!DOCTYPE html>
 <html>
 <head>
@@ -234,14 +150,16 @@ class LabReportSender:
                     <tr>
                         <td style="background: linear-gradient(135deg, #667eea 0%, #764ba2 100%); padding: 30px; text-align: center;">
                             <h1 style="margin: 0; color: #ffffff; font-size: 28px; font-weight: 600;">Lab Grade Report</h1>
-                            <p style="margin: 10px 0 0 0; color: #e9ecef; font-size: 16px;">{lab_title}</p>
+                            """
+
+_HTML_BODY_TEMPLATE = Template("""<p style="margin: 10px 0 0 0; color: #e9ecef; font-size: 16px;">$lab_title</p>
                         </td>
                     </tr>
 
                     <!-- Greeting -->
                     <tr>
                         <td style="padding: 30px 30px 20px 30px;">
-                            <p style="margin: 0; font-size: 16px; color: #495057;">Dear <strong>{nsp_name}</strong>,</p>
+                            <p style="margin: 0; font-size: 16px; color: #495057;">Dear <strong>$nsp_name</strong>,</p>
                             <p style="margin: 10px 0 0 0; font-size: 14px; color: #6c757d;">Your lab has been reviewed and graded. Here are your results:</p>
                         </td>
                     </tr>
@@ -249,11 +167,11 @@ class LabReportSender:
                     <!-- Status Badge -->
                     <tr>
                         <td style="padding: 0 30px;">
-                            <div style="background-color: {status_bg}; border-left: 4px solid {status_color}; padding: 20px; border-radius: 8px; text-align: center;">
-                                <div style="font-size: 48px; margin-bottom: 10px;">{status_icon}</div>
-                                <div style="font-size: 24px; font-weight: bold; color: {status_color}; margin-bottom: 5px;">{status}</div>
-                                <div style="font-size: 32px; font-weight: bold; color: #495057;">{score_percent}%</div>
-                                <div style="font-size: 14px; color: #6c757d; margin-top: 5px;">Passing Score: {passing_percent}%</div>
+                            <div style="background-color: $status_bg; border-left: 4px solid $status_color; padding: 20px; border-radius: 8px; text-align: center;">
+                                <div style="font-size: 48px; margin-bottom: 10px;">$status_icon</div>
+                                <div style="font-size: 24px; font-weight: bold; color: $status_color; margin-bottom: 5px;">$status</div>
+                                <div style="font-size: 32px; font-weight: bold; color: #495057;">$score_percent%</div>
+                                <div style="font-size: 14px; color: #6c757d; margin-top: 5px;">Passing Score: $passing_percent%</div>
                             </div>
                         </td>
                     </tr>
@@ -267,7 +185,7 @@ class LabReportSender:
                                         <strong style="color: #495057;">Attempt:</strong>
                                     </td>
                                     <td style="padding: 12px 20px; border-bottom: 1px solid #dee2e6; text-align: right; color: #6c757d;">
-                                        {attempt}
+                                        $attempt
                                     </td>
                                 </tr>
                                 <tr>
@@ -275,7 +193,7 @@ class LabReportSender:
                                         <strong style="color: #495057;">Re-do Required:</strong>
                                     </td>
                                     <td style="padding: 12px 20px; border-bottom: 1px solid #dee2e6; text-align: right; color: #6c757d;">
-                                        {redo_lab}
+                                        $redo_lab
                                     </td>
                                 </tr>
                                 <tr>
@@ -283,7 +201,7 @@ class LabReportSender:
                                         <strong style="color: #495057;">Plagiarism Check:</strong>
                                     </td>
                                     <td style="padding: 12px 20px; text-align: right; color: #6c757d;">
-                                        {plagiarism}
+                                        $plagiarism
                                     </td>
                                 </tr>
                             </table>
@@ -303,7 +221,7 @@ class LabReportSender:
                                     </tr>
                                 </thead>
                                 <tbody>
-                                    {rubric_rows}
+                                    $rubric_rows
                                 </tbody>
                             </table>
                         </td>
@@ -314,7 +232,7 @@ class LabReportSender:
                         <td style="padding: 20px 30px;">
                             <h2 style="margin: 0 0 15px 0; color: #495057; font-size: 20px; border-bottom: 2px solid #28a745; padding-bottom: 10px;">✨ Strengths</h2>
                             <div style="background-color: #d4edda; border-left: 4px solid #28a745; padding: 15px; border-radius: 8px; color: #155724; line-height: 1.6;">
-                                {strengths_text}
+                                $strengths_text
                             </div>
                         </td>
                     </tr>
@@ -324,7 +242,7 @@ class LabReportSender:
                         <td style="padding: 20px 30px;">
                             <h2 style="margin: 0 0 15px 0; color: #495057; font-size: 20px; border-bottom: 2px solid #ffc107; padding-bottom: 10px;">📈 Areas for Improvement</h2>
                             <div style="background-color: #fff3cd; border-left: 4px solid #ffc107; padding: 15px; border-radius: 8px; color: #856404; line-height: 1.6;">
-                                {gaps_text}
+                                $gaps_text
                             </div>
                         </td>
                     </tr>
@@ -334,12 +252,14 @@ class LabReportSender:
                         <td style="padding: 20px 30px;">
                             <h2 style="margin: 0 0 15px 0; color: #495057; font-size: 20px; border-bottom: 2px solid #17a2b8; padding-bottom: 10px;">💬 Additional Remarks</h2>
                             <div style="background-color: #d1ecf1; border-left: 4px solid #17a2b8; padding: 15px; border-radius: 8px; color: #0c5460; line-height: 1.6;">
-                                {other_text}
+                                $other_text
                             </div>
                         </td>
                     </tr>
 
-                    <!-- Footer -->
+""")
+
+_HTML_FOOTER = """                    <!-- Footer -->
                     <tr>
                         <td style="padding: 30px; background-color: #f8f9fa; text-align: center; border-top: 1px solid #dee2e6;">
                             <p style="margin: 0 0 10px 0; color: #6c757d; font-size: 14px;">If you have any questions about your grade, please reach out during office hours.</p>
@@ -361,7 +281,269 @@ class LabReportSender:
 </body>
 </html>
 """
-        return html
+
+
+class LabReportSender:
+    def __init__(self, grading_file: str, email_list_file: str):
+        self.grading_file = grading_file
+        self.email_list_file = email_list_file
+        self.email_list = None
+        self.grading_data = None
+        # Workbook handles, opened lazily and reused so each sheet read
+        # doesn't reparse the whole XLSX from scratch
+        self._grading_xl = None
+        self._email_xl = None
+        # Warm SMTP connection pool, kept across send_emails calls
+        self._smtp_pool = None
+        self._smtp_pool_size = 0
+        self._smtp_params = None
+
+    def close(self):
+        """Release the cached workbook handles"""
+        for handle in (self._grading_xl, self._email_xl):
+            if handle is not None:
+                handle.close()
+        self._grading_xl = None
+        self._email_xl = None
+        self.close_smtp()
+
+    def load_email_list(self):
+        """Load NSP email list from Excel file"""
+        print("Loading NSP email list...")
+
+        def parse():
+            if self._email_xl is None:
+                self._email_xl = open_workbook(self.email_list_file)
+            # Only two columns are ever read; project and type them at parse
+            # time instead of materializing the whole sheet and copying
+            return self._email_xl.parse(
+                'QA Class List',
+                usecols=['Full Name', 'AmaliTech Email'],
+                dtype={'Full Name': 'string', 'AmaliTech Email': 'string'}
+            )
+
+        self.email_list = parse_sheet_cached(self.email_list_file, 'QA Class List', 0, parse)
+
+        # Build lookup structures once so match_nsp_email doesn't rescan
+        # the whole DataFrame for every grading row. Rows with a blank
+        # email cell (pd.NA under the string dtype) are left out of the
+        # indices so a name hit can only ever return a real address or
+        # fall through to None
+        self._names_norm = self.email_list['Full Name'].astype(str).str.strip().str.lower()
+        has_email = self.email_list['AmaliTech Email'].notna()
+        pairs = list(zip(self._names_norm[has_email],
+                         self.email_list.loc[has_email, 'AmaliTech Email']))
+        self._exact_index = dict(pairs)
+        self._name_index = pairs
+        self._token_index = [(frozenset(name.split()), email) for name, email in pairs]
+        self._choices = [name for name, _ in pairs]
+        self._match_cache = {}
+
+        print(f"Loaded {len(self.email_list)} NSPs")
+        return self.email_list
+
+    def load_grading_data(self, module_name: str):
+        """Load grading data from specific module sheet"""
+        pd = _pandas()
+        print(f"Loading grading data from {module_name}...")
+
+        # Read Excel with proper structure:
+        # Row 1 (index 0): Allocated Points
+        # Row 2 (index 1): Passing Score, weights for 1st attempt
+        # Row 3 (index 2): weights for 2nd attempt
+        # Row 4 (index 3): Column headers (Review Date, Name of NSP, Reviewer, Lab Title, Attempt, rubrics, Total Score, etc.)
+        # Row 5+ (index 4+): Actual data
+
+        # Use row 3 (0-indexed) as header, which is Excel row 4
+        def parse():
+            if self._grading_xl is None:
+                self._grading_xl = open_workbook(self.grading_file)
+            # The rubric columns vary per module so they must all be read,
+            # but 'Review Date' is never consumed anywhere
+            return self._grading_xl.parse(module_name, header=3,
+                                          usecols=lambda c: c != 'Review Date')
+
+        df_data = parse_sheet_cached(self.grading_file, module_name, 3, parse)
+
+        # Drop rows without an NSP name in one vectorized pass; downstream
+        # code can assume every row names a student
+        if 'Name of NSP' in df_data.columns:
+            names = df_data['Name of NSP'].astype('string').str.strip()
+            df_data = df_data[names.notna() & (names != '')]
+            # Lowercased once here so name searches don't re-lower per query
+            self._grading_names_lower = names.loc[df_data.index].str.lower()
+        else:
+            self._grading_names_lower = None
+
+        # Classify columns once and cast scores column-wise, so the per-row
+        # checks don't have to re-discover rubric columns or coerce cells
+        self._rubric_cols = [c for c in df_data.columns if c not in NON_RUBRIC_COLUMNS]
+        df_data[self._rubric_cols] = df_data[self._rubric_cols].apply(pd.to_numeric, errors='coerce')
+        if 'Total Score' in df_data.columns:
+            df_data['Total Score'] = pd.to_numeric(df_data['Total Score'], errors='coerce').fillna(0.0)
+        else:
+            df_data['Total Score'] = 0.0
+
+        remark_cols = [c for c in ('Remarks: Strengths', 'Remarks: Gaps') if c in df_data.columns]
+        df_data['_has_rubric'] = df_data[self._rubric_cols].notna().any(axis=1)
+        df_data['_has_remarks'] = df_data[remark_cols].notna().any(axis=1) if remark_cols else False
+
+        # Precompute the (rubric, score) pairs each email renders, so
+        # generate_email_content doesn't re-walk the rubric columns per row
+        df_data['_rubric_pairs'] = df_data[self._rubric_cols].apply(
+            lambda s: [(c, int(v) if v == int(v) else v) for c, v in s.dropna().items()],
+            axis=1
+        )
+
+        self.grading_data = df_data
+        print(f"Loaded {len(df_data)} grading records")
+        return df_data
+
+    def match_nsp_email(self, nsp_name: str) -> str:
+        """Match NSP name to email address"""
+        if self.email_list is None:
+            self.load_email_list()
+
+        # Clean up name for matching
+        nsp_name_clean = str(nsp_name).strip().lower()
+
+        # Each unique name only needs to be resolved once
+        if nsp_name_clean in self._match_cache:
+            return self._match_cache[nsp_name_clean]
+
+        # Try exact match first
+        email = self._exact_index.get(nsp_name_clean)
+
+        # Try partial match - check if grading name is IN email list name
+        if email is None:
+            for email_name, candidate in self._name_index:
+                if nsp_name_clean in email_name:
+                    email = candidate
+                    break
+
+        # Fuzzy fallback - catches cases like "Bernice Mawuena" in grading
+        # matching "Bernice Adime Mawuena" in the email list
+        if email is None:
+            if process is not None:
+                result = process.extractOne(nsp_name_clean, self._choices,
+                                            scorer=fuzz.token_set_ratio, score_cutoff=85)
+                if result is not None:
+                    email = self._exact_index[result[0]]
+            else:
+                grading_parts = set(nsp_name_clean.split())
+                for email_parts, candidate in self._token_index:
+                    # If at least 2 name parts match (e.g., "bernice" and "mawuena"), consider it a match
+                    if len(email_parts.intersection(grading_parts)) >= 2:
+                        email = candidate
+                        break
+
+        self._match_cache[nsp_name_clean] = email
+        return email
+
+    def is_grade_complete(self, row) -> Tuple[bool, str]:
+        """
+        Check if a student's grade is complete (has scores AND remarks)
+        Returns: (is_complete, reason_if_incomplete)
+        """
+        # All the heavy lifting happened column-wise in load_grading_data;
+        # here we just read the precomputed values
+        if not row.get('Total Score', 0):
+            return False, "No total score"
+
+        if not row.get('_has_rubric', False):
+            return False, "No rubric scores"
+
+        if not row.get('_has_remarks', False):
+            return False, "No remarks/feedback"
+
+        return True, ""
+
+    def generate_email_content(self, row) -> Tuple[str, str]:
+        """Generate email subject and body from grading row"""
+
+        # Extract basic data using column names
+        nsp_name = row.get('Name of NSP', 'NSP')
+        reviewer = row.get('Reviewer', 'N/A')
+        lab_title = row.get('Lab Title', 'Lab')
+        attempt = row.get('Attempt', 'N/A')
+        total_score = row.get('Total Score', 0)
+        redo_lab = row.get('Re-do Lab', 'No')
+        plagiarism = row.get('Plagiarism Check', 'N/A')
+        strengths = row.get('Remarks: Strengths', '')
+        gaps = row.get('Remarks: Gaps', '')
+        other_remarks = row.get('Other Remarks', '')
+
+        # Determine pass/fail status ('Total Score' was already cast to a
+        # float and NaN-filled by load_grading_data)
+        passing_score = PASSING_SCORE
+        total_score_float = total_score or 0.0
+
+        status = "PASSED" if total_score_float >= passing_score else "NEEDS RE-DO"
+
+        # Rubric (name, score) pairs were precomputed at load time
+        rubric_data = row.get('_rubric_pairs') or []
+
+        # Create subject
+        subject = f"Lab Grade: {lab_title} - {status}"
+
+        # Generate HTML email body
+        body = self._generate_html_email(
+            nsp_name, lab_title, status, total_score_float, passing_score,
+            attempt, redo_lab, plagiarism, rubric_data, strengths, gaps, other_remarks
+        )
+
+        return subject, body
+
+    def _generate_html_email(self, nsp_name, lab_title, status, total_score, passing_score,
+                            attempt, redo_lab, plagiarism, rubric_data, strengths, gaps, other_remarks):
+        """Generate beautifully formatted HTML email"""
+        pd = _pandas()
+
+        # Status colors
+        status_color = "#28a745" if status == "PASSED" else "#dc3545"
+        status_bg = "#d4edda" if status == "PASSED" else "#f8d7da"
+        status_icon = "\u2713" if status == "PASSED" else "\u2717"
+
+        # Score percentage
+        score_percent = int(total_score * 100)
+        passing_percent = int(passing_score * 100)
+
+        # Build rubric rows (score bar assumes max score is 5)
+        if rubric_data:
+            rubric_rows = "".join(
+                _RUBRIC_ROW_TEMPLATE.substitute(
+                    rubric_name=rubric_name,
+                    score=score,
+                    bar_width=int((score / 5) * 100),
+                    bar_color="#28a745" if score >= 4 else "#ffc107" if score >= 3 else "#dc3545",
+                )
+                for rubric_name, score in rubric_data
+            )
+        else:
+            rubric_rows = _NO_RUBRIC_ROW
+
+        # Format remarks
+        strengths_text = strengths if pd.notna(strengths) else 'No feedback provided'
+        gaps_text = gaps if pd.notna(gaps) else 'No feedback provided'
+        other_text = other_remarks if pd.notna(other_remarks) else 'No additional remarks'
+
+        return _HTML_HEAD + _HTML_BODY_TEMPLATE.substitute(
+            nsp_name=nsp_name,
+            lab_title=lab_title,
+            status=status,
+            status_color=status_color,
+            status_bg=status_bg,
+            status_icon=status_icon,
+            score_percent=score_percent,
+            passing_percent=passing_percent,
+            attempt=attempt,
+            redo_lab=redo_lab,
+            plagiarism=plagiarism,
+            rubric_rows=rubric_rows,
+            strengths_text=strengths_text,
+            gaps_text=gaps_text,
+            other_text=other_text,
+        ) + _HTML_FOOTER
 
     def preview_emails(self, module_name: str) -> List[Dict]:
         """Preview all emails that will be sent"""
@@ -380,14 +562,24 @@ class LabReportSender:
         print(f"EMAIL PREVIEW - {module_name}")
         print(f"{'='*80}\n")
 
-        # Iterate through grading data
-        for idx, row in self.grading_data.iterrows():
-            # Get NSP name using column name
-            nsp_name = row.get('Name of NSP', None)
+        # Empty-name rows were already dropped at load time; iterate plain
+        # dicts instead of iterrows() which materializes a Series per row
+        pd = _pandas()
+        named_rows = self.grading_data.copy()
+
+        # Resolve emails for the whole batch with one vectorized hash-join
+        # on normalized names; only the misses hit the fuzzy matcher below
+        named_rows['_key'] = named_rows['Name of NSP'].astype(str).str.strip().str.lower()
+        email_df = self.email_list.assign(_key=self._names_norm)
+        merged = named_rows.merge(
+            email_df[['_key', 'AmaliTech Email']].drop_duplicates('_key'),
+            on='_key', how='left'
+        )
 
-            # Skip empty rows
-            if pd.isna(nsp_name) or str(nsp_name).strip() == '':
-                continue
+        # First pass: classify rows and resolve recipients
+        matched_rows = []
+        for row in merged.to_dict(orient='records'):
+            nsp_name = row.get('Name of NSP', None)
 
             # Check if grade is complete
             is_complete, incomplete_reason = self.is_grade_complete(row)
@@ -396,26 +588,33 @@ class LabReportSender:
                 skipped_incomplete.append((str(nsp_name), incomplete_reason))
                 continue
 
-            # Check if email exists
-            email = self.match_nsp_email(str(nsp_name))
+            # Check if email exists (merge miss -> partial/fuzzy matching)
+            email = row.get('AmaliTech Email')
+            if email is None or pd.isna(email):
+                email = self.match_nsp_email(str(nsp_name))
 
             if email:
-                subject, body = self.generate_email_content(row)
-
-                emails_to_send.append({
-                    'to': email,
-                    'to_name': nsp_name,
-                    'subject': subject,
-                    'body': body
-                })
-
-                print(f"[{len(emails_to_send)}] To: {nsp_name} <{email}>")
-                print(f"    Subject: {subject}")
-                print(f"    Preview: {body[:150]}...")
-                print()
+                matched_rows.append((row, email))
             else:
                 skipped_no_email.append(str(nsp_name))
 
+        # Second pass: render every body against the precompiled template
+        # in one batch, then report
+        for row, email in matched_rows:
+            subject, body = self.generate_email_content(row)
+
+            emails_to_send.append({
+                'to': email,
+                'to_name': row['Name of NSP'],
+                'subject': subject,
+                'body': body
+            })
+
+            print(f"[{len(emails_to_send)}] To: {row['Name of NSP']} <{email}>")
+            print(f"    Subject: {subject}")
+            print(f"    Preview: {body[:150]}...")
+            print()
+
         print(f"{'='*80}")
         print(f"SUMMARY")
         print(f"{'='*80}")
@@ -439,55 +638,116 @@ class LabReportSender:
         return emails_to_send
 
     def send_emails(self, emails_to_send: List[Dict], smtp_server: str, smtp_port: int,
-                   sender_email: str, sender_password: str):
-        """Send emails via SMTP"""
+                   sender_email: str, sender_password: str, max_workers: int = 4):
+        """Send emails via SMTP using a pool of persistent connections"""
+        from email.message import EmailMessage
 
-        print(f"\nConnecting to {smtp_server}:{smtp_port}...")
+        workers = min(max_workers, len(emails_to_send)) or 1
 
-        try:
-            # Connect to SMTP server
-            server = smtplib.SMTP(smtp_server, smtp_port)
-            server.starttls()
-            server.login(sender_email, sender_password)
+        # Reuse the warm connection pool across calls to the same
+        # server/account; only the TLS handshake + AUTH for missing
+        # connections is paid, and a fresh account rebuilds the pool
+        params = (smtp_server, smtp_port, sender_email)
+        if self._smtp_params != params:
+            self.close_smtp()
 
-            print("Connected successfully!\n")
+        if self._smtp_pool is None:
+            self._smtp_pool = queue.Queue()
+            self._smtp_pool_size = 0
+            self._smtp_params = params
 
-            sent_count = 0
-            failed = []
+        print(f"\nConnecting to {smtp_server}:{smtp_port}...")
 
-            for email_data in emails_to_send:
+        try:
+            while self._smtp_pool_size < workers:
+                self._smtp_pool.put(
+                    self._connect_smtp(smtp_server, smtp_port, sender_email, sender_password))
+                self._smtp_pool_size += 1
+        except Exception as e:
+            if self._smtp_pool_size == 0:
+                print(f"[ERROR] Failed to connect to SMTP server: {e}")
+                self.close_smtp()
+                return
+
+        connections = self._smtp_pool
+        print(f"Connected successfully! ({self._smtp_pool_size} connection(s))\n")
+
+        def send_one(email_data):
+            # Create message
+            msg = EmailMessage()
+            msg['From'] = sender_email
+            msg['To'] = email_data['to']
+            msg['Subject'] = email_data['subject']
+            msg.set_content("This report is best viewed in an HTML-capable mail client.")
+            msg.add_alternative(email_data['body'], subtype='html')
+
+            # Send email over a pooled connection, health-checking it
+            # first since it may have idled since the last batch. The
+            # finally covers the reconnect too: if replacing a stale
+            # connection fails, the old one goes back in the queue so the
+            # pool never loses a slot and later sends can retry.
+            server = connections.get()
+            try:
                 try:
-                    # Create message
-                    msg = MIMEMultipart('alternative')
-                    msg['From'] = sender_email
-                    msg['To'] = email_data['to']
-                    msg['Subject'] = email_data['subject']
-
-                    # Attach HTML content
-                    msg.attach(MIMEText(email_data['body'], 'html', 'utf-8'))
-
-                    # Send email
-                    server.send_message(msg)
+                    server.noop()
+                except Exception:
+                    server = self._connect_smtp(smtp_server, smtp_port,
+                                                sender_email, sender_password)
+                # 8BITMIME sends the UTF-8 body as-is instead of paying a
+                # quoted-printable re-encode, when the server supports it
+                opts = ['BODY=8BITMIME'] if '8bitmime' in server.esmtp_features else []
+                server.send_message(msg, mail_options=opts)
+            finally:
+                connections.put(server)
+
+        sent_count = 0
+        failed = []
+
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            futures = {executor.submit(send_one, email_data): email_data
+                       for email_data in emails_to_send}
+
+            for future in as_completed(futures):
+                email_data = futures[future]
+                try:
+                    future.result()
                     sent_count += 1
                     print(f"[OK] Sent to {email_data['to_name']} ({email_data['to']})")
-
                 except Exception as e:
                     failed.append((email_data['to_name'], str(e)))
                     print(f"[FAILED] Failed to send to {email_data['to_name']}: {e}")
 
-            server.quit()
+        # The pool stays warm for subsequent sends; close_smtp() ends it
 
-            print(f"\n{'='*80}")
-            print(f"Sending complete!")
-            print(f"Sent: {sent_count}/{len(emails_to_send)}")
-            if failed:
-                print(f"Failed: {len(failed)}")
-                for name, error in failed:
-                    print(f"  - {name}: {error}")
-            print(f"{'='*80}\n")
+        print(f"\n{'='*80}")
+        print(f"Sending complete!")
+        print(f"Sent: {sent_count}/{len(emails_to_send)}")
+        if failed:
+            print(f"Failed: {len(failed)}")
+            for name, error in failed:
+                print(f"  - {name}: {error}")
+        print(f"{'='*80}\n")
 
-        except Exception as e:
-            print(f"[ERROR] Failed to connect to SMTP server: {e}")
+    @staticmethod
+    def _connect_smtp(smtp_server, smtp_port, sender_email, sender_password):
+        """Open a logged-in SMTP connection"""
+        import smtplib
+        server = smtplib.SMTP(smtp_server, smtp_port)
+        server.starttls()
+        server.login(sender_email, sender_password)
+        return server
+
+    def close_smtp(self):
+        """Quit every pooled SMTP connection"""
+        if self._smtp_pool is not None:
+            while not self._smtp_pool.empty():
+                try:
+                    self._smtp_pool.get_nowait().quit()
+                except Exception:
+                    pass
+        self._smtp_pool = None
+        self._smtp_pool_size = 0
+        self._smtp_params = None
 
 
 def main():
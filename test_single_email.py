@@ -4,10 +4,9 @@ Allows testing the email sending functionality with a single student record
 and a custom destination email address.
 """
 
-from lab_report_sender import LabReportSender
+from lab_report_sender import LabReportSender, PASSING_SCORE
 from email_config import EmailConfig
 import getpass
-import pandas as pd
 import sys
 
 class TestLabReportSender(LabReportSender):
@@ -15,10 +14,7 @@ class TestLabReportSender(LabReportSender):
         print("\n=== TEST SINGLE EMAIL MODE ===\n")
 
         # 1. Select Module
-        print("Available modules:")
-        print("1. Module-1")
-        print("2. Module-2")
-        print("3. Module-3")
+        sys.stdout.write("Available modules:\n1. Module-1\n2. Module-2\n3. Module-3\n")
         
         module_choice = input("\nSelect module number (1-3): ").strip()
         module_map = {'1': 'Module-1', '2': 'Module-2', '3': 'Module-3'}
@@ -35,44 +31,41 @@ class TestLabReportSender(LabReportSender):
 
         # 2. Select Student
         print(f"\nStudents in {module_name}:")
-        student_records = []
-        
-        # Filter for valid students (those with names)
-        for idx, row in self.grading_data.iterrows():
-            nsp_name = row.get('Name of NSP')
-            if pd.notna(nsp_name) and str(nsp_name).strip() != '':
-                student_records.append((idx, row))
 
-        print(f"\nFound {len(student_records)} students.")
+        # Empty-name rows were already dropped (and names normalized) by
+        # load_grading_data, so every remaining row is a valid student
+        names_lower = self._grading_names_lower
+
+        print(f"\nFound {len(self.grading_data)} students.")
         search_query = input("Enter student name to search (or press Enter to list all): ").strip().lower()
 
-        filtered_records = []
         if search_query:
-            for i, (idx, row) in enumerate(student_records):
-                nsp_name = str(row.get('Name of NSP')).strip()
-                if search_query in nsp_name.lower():
-                    filtered_records.append((i, idx, row)) # Keep original 'i' (index in full list) for consistency if needed, or just iterate
+            hits = self.grading_data[names_lower.str.contains(search_query, regex=False, na=False)]
         else:
             # All records
-            filtered_records = [(i, idx, row) for i, (idx, row) in enumerate(student_records)]
+            hits = self.grading_data
 
-        if not filtered_records:
+        if hits.empty:
             print("No students found matching that name.")
             return
 
-        print("\nSelect student:")
-        for i, (original_list_idx, idx, row) in enumerate(filtered_records):
-            nsp_name = row.get('Name of NSP')
-            status = "PASSED" if row.get('Total Score', 0) >= 0.8 else "NEEDS RE-DO"
-            print(f"{i+1}. {nsp_name} ({status})")
+        # Pull the two listed columns out as arrays instead of building a
+        # dict per row; only the chosen row is materialized below. The
+        # whole list goes out in one write rather than one print per row.
+        listing = list(zip(hits['Name of NSP'].to_numpy(), hits['Total Score'].to_numpy()))
+        lines = [
+            f"{i+1}. {nsp_name} ({'PASSED' if total_score >= PASSING_SCORE else 'NEEDS RE-DO'})"
+            for i, (nsp_name, total_score) in enumerate(listing)
+        ]
+        sys.stdout.write("\nSelect student:\n" + "\n".join(lines) + "\n")
 
         try:
             selection = int(input("\nSelect number from above list: ").strip())
-            if selection < 1 or selection > len(filtered_records):
+            if selection < 1 or selection > len(listing):
                 print("Invalid selection!")
                 return
-            
-            _, selected_idx, selected_row = filtered_records[selection - 1]
+
+            selected_row = hits.iloc[selection - 1]
             nsp_name = selected_row.get('Name of NSP')
 
         except ValueError: